@@ -1,13 +1,37 @@
 import asyncio
+import io
+import mmap
 import os
+import posixpath
+import shutil
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from functools import lru_cache, wraps
+from itertools import islice
 from pathlib import Path
-from zipfile import ZipFile
+from xml.sax.saxutils import escape
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+import docx.opc.phys_pkg
+import openpyxl.writer.excel
+import pptx.opc.serialized
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from lxml import etree
 from openpyxl import Workbook, load_workbook
 from pptx import Presentation
+from pptx.util import lazyproperty
 
 from mcp.server.fastmcp import FastMCP
 
+try:
+    import zstandard  # optional: install with the "zstd" extra
+except ImportError:
+    zstandard = None
+
 # Initialize MCP server
 mcp = FastMCP("office-mcp")
 
@@ -15,16 +39,260 @@ mcp = FastMCP("office-mcp")
 DOCS_DIR = Path("./documents")
 DOCS_DIR.mkdir(exist_ok=True)
 
+# WordprocessingML namespace, used when streaming word/document.xml
+_W_NS = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+_W = f"{{{_W_NS['w']}}}"
+# mc:Fallback repeats the content of the mc:Choice next to it (e.g. a VML copy
+# of a DrawingML text box), so paragraphs under it are skipped
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+# Compiled once at import; yields the run content elements under a paragraph
+# in document order, matching what python-docx's Run.text reads
+_W_RUN_CONTENT_XPATH = etree.XPath(
+    ".//w:r/w:t | .//w:r/w:tab | .//w:r/w:br | .//w:r/w:cr | .//w:r/w:noBreakHyphen | .//w:r/w:ptab",
+    namespaces=_W_NS,
+)
+_W_RUN_CHARS = {f"{_W}tab": "\t", f"{_W}ptab": "\t", f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-"}
+_W_T = f"{_W}t"
+_W_BR = f"{_W}br"
+_W_BR_TYPE = f"{_W}type"
+
+def _paragraph_text(p) -> str:
+    parts = []
+    for elem in _W_RUN_CONTENT_XPATH(p):
+        if elem.tag == _W_T:
+            parts.append(elem.text or "")
+        elif elem.tag == _W_BR:
+            # Page and column breaks have no text, like python-docx
+            if elem.get(_W_BR_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            parts.append(_W_RUN_CHARS[elem.tag])
+    return "".join(parts)
+
+@lru_cache(maxsize=256)
 def get_path(filename: str, ext: str) -> Path:
-    if not filename.endswith(ext):
-        filename += ext
-    return DOCS_DIR / filename
+    return DOCS_DIR / (filename if filename.endswith(ext) else filename + ext)
+
+# Opt-in O_DIRECT writes for large files, bypassing the page cache (Linux only)
+USE_ODIRECT = os.environ.get("USE_ODIRECT", "") == "1" and hasattr(os, "O_DIRECT")
+ODIRECT_MIN_SIZE = 1 << 20
+_ODIRECT_ALIGN = 4096
+
+def _write_direct(path: Path, data: bytes) -> None:
+    # O_DIRECT needs an aligned buffer and length: anonymous mmaps are page
+    # aligned and zero-filled, so pad to the block size and truncate afterwards
+    size = len(data)
+    aligned_len = -(-size // _ODIRECT_ALIGN) * _ODIRECT_ALIGN
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o666)
+    try:
+        with mmap.mmap(-1, aligned_len) as buf:
+            buf.write(data)
+            written = os.pwrite(fd, buf, 0)
+        if written != aligned_len:
+            # ftruncate would zero-fill the missing tail; let the caller fall back
+            raise OSError(f"short O_DIRECT write: {written} of {aligned_len} bytes")
+        os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+# Evict large one-shot documents from the page cache after reading/writing
+# them; small files are cheap to keep and likely to be read again soon.
+# Set DROP_PAGE_CACHE=0 to keep everything cached
+DROP_PAGE_CACHE = os.environ.get("DROP_PAGE_CACHE", "1") == "1" and hasattr(os, "posix_fadvise")
+DROP_PAGE_CACHE_MIN_SIZE = ODIRECT_MIN_SIZE
+
+def drop_page_cache(path: Path) -> None:
+    # Only a hint: dirty pages are dropped once the kernel has written them back
+    if not DROP_PAGE_CACHE:
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            if os.fstat(fd).st_size >= DROP_PAGE_CACHE_MIN_SIZE:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def save_document(obj, path: Path) -> None:
+    # Serialize in memory so the file is written with one call instead of
+    # many small zip-entry writes
+    buf = io.BytesIO()
+    obj.save(buf)
+    data = buf.getbuffer()
+    if USE_ODIRECT and len(data) >= ODIRECT_MIN_SIZE:
+        try:
+            _write_direct(path, data)
+            return
+        except OSError:
+            pass  # e.g. filesystem without O_DIRECT support; use a normal write
+    with open(path, "wb") as f:
+        f.write(data)
+    drop_page_cache(path)
+
+# Leading bytes of part formats that are already compressed (embedded
+# packages/zip, JPEG, PNG, GIF, gzip, RIFF media); deflating them again
+# costs CPU for no size gain
+_COMPRESSED_MAGIC = (b"PK\x03\x04", b"\xff\xd8\xff", b"\x89PNG", b"GIF8", b"\x1f\x8b", b"RIFF")
+
+class PartZipFile(ZipFile):
+    """
+    ZipFile that stores already-compressed parts and deflates everything else.
+    """
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if compress_type is None and isinstance(data, bytes) and data.startswith(_COMPRESSED_MAGIC):
+            compress_type = ZIP_STORED
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+def _zipf(self):
+    # Replacement for python-pptx's _ZipPkgWriter._zipf with the same arguments
+    return PartZipFile(self._pkg_file, "w", compression=ZIP_DEFLATED, strict_timestamps=False)
+
+# Route the python-docx, python-pptx and openpyxl package writers through PartZipFile
+docx.opc.phys_pkg.ZipFile = PartZipFile
+pptx.opc.serialized._ZipPkgWriter._zipf = lazyproperty(_zipf)
+openpyxl.writer.excel.ZipFile = PartZipFile
+
+# Parsed Document/Workbook objects kept between updates, keyed by path and
+# validated against the file's mtime and size
+DOCUMENT_CACHE_SIZE = 32
+_document_cache: OrderedDict[Path, tuple[tuple[int, int], object]] = OrderedDict()
+_document_cache_lock = threading.Lock()
+
+def _file_key(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+def checkout_document(path: Path, loader):
+    """
+    Return the cached object for path if the file is unchanged since it was
+    cached, otherwise loader(path). The entry is removed while the caller
+    mutates it; hand it back with checkin_document() after a successful save.
+    """
+    key = _file_key(path)
+    with _document_cache_lock:
+        entry = _document_cache.pop(path, None)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    return loader(path)
+
+def checkin_document(path: Path, obj) -> None:
+    key = _file_key(path)
+    with _document_cache_lock:
+        _document_cache[path] = (key, obj)
+        while len(_document_cache) > DOCUMENT_CACHE_SIZE:
+            _document_cache.popitem(last=False)
+
+# ZIP end-of-central-directory record and central directory file header
+_ZIP_EOCD = struct.Struct("<4s4H2LH")
+_ZIP_CDH = struct.Struct("<4s6H3L5H2L")
+
+def zip_namelist(path: Path) -> list[str]:
+    # Read entry names straight from the central directory, without building
+    # a ZipInfo per entry the way zipfile.ZipFile does
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        eocd = mm.rfind(b"PK\x05\x06", max(0, len(mm) - _ZIP_EOCD.size - 0xFFFF))
+        if eocd < 0:
+            raise ValueError("not a zip file")
+        _, _, _, _, count, _, offset, _ = _ZIP_EOCD.unpack_from(mm, eocd)
+        names = []
+        for _ in range(count):
+            fields = _ZIP_CDH.unpack_from(mm, offset)
+            if fields[0] != b"PK\x01\x02":
+                raise ValueError("corrupt central directory")
+            flags, (name_len, extra_len, comment_len) = fields[3], fields[10:13]
+            start = offset + _ZIP_CDH.size
+            names.append(mm[start:start + name_len].decode("utf-8" if flags & 0x800 else "cp437"))
+            offset = start + name_len + extra_len + comment_len
+    return names
+
+# -------------------------------
+# ASYNC DISPATCH
+# -------------------------------
+
+# Debounce window for coalescing concurrent updates to the same file
+COALESCE_DELAY = 0.005
+
+_file_locks: dict[Path, asyncio.Lock] = {}
+_pending_changes: dict[Path, list] = {}
+_flush_tasks: set[asyncio.Task] = set()
+
+@asynccontextmanager
+async def file_locks(*paths: Path):
+    # Acquire in sorted order so tools that lock two files cannot deadlock
+    async with AsyncExitStack() as stack:
+        for path in sorted(set(paths)):
+            await stack.enter_async_context(_file_locks.setdefault(path, asyncio.Lock()))
+        yield
+
+def run_in_thread(ext: str):
+    # Run blocking document I/O off the event loop so one slow file does not
+    # stall every other MCP request, holding the file's lock so no tool sees
+    # a half-written file or loses a concurrent save
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(filename: str, *args, **kwargs):
+            async with file_locks(get_path(filename, ext)):
+                return await asyncio.to_thread(func, filename, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def _resolve(fut: asyncio.Future, exc: Exception | None = None) -> None:
+    # The caller may have been cancelled while its item was queued
+    if fut.done():
+        return
+    if exc is None:
+        fut.set_result(None)
+    else:
+        fut.set_exception(exc)
+
+async def _flush_pending(path: Path, apply) -> None:
+    await asyncio.sleep(COALESCE_DELAY)
+    async with file_locks(path):
+        batch = _pending_changes.pop(path)
+        try:
+            await asyncio.to_thread(apply, path, [item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                _resolve(batch[0][1], e)
+                return
+            # Retry each item on its own so only the caller whose item is bad
+            # gets the error; the failed object was not checked back in
+            for item, fut in batch:
+                try:
+                    await asyncio.to_thread(apply, path, [item])
+                except Exception as e:
+                    _resolve(fut, e)
+                else:
+                    _resolve(fut)
+        else:
+            for _, fut in batch:
+                _resolve(fut)
+
+async def coalesced_update(path: Path, item, apply) -> None:
+    """
+    Queue item for path and wait until it is written. Calls that arrive within
+    COALESCE_DELAY of each other share one apply(path, items) call, so the file
+    is opened and saved once per batch instead of once per request.
+    """
+    fut = asyncio.get_running_loop().create_future()
+    batch = _pending_changes.setdefault(path, [])
+    batch.append((item, fut))
+    if len(batch) == 1:
+        # Keep a reference so the flush task is not garbage collected mid-run
+        task = asyncio.create_task(_flush_pending(path, apply))
+        _flush_tasks.add(task)
+        task.add_done_callback(_flush_tasks.discard)
+    await fut
 
 # -------------------------------
 # WORD TOOLS (.docx)
 # -------------------------------
 
 @mcp.tool()
+@run_in_thread(".docx")
 def create_docx(filename: str, content: str = "") -> str:
     path = get_path(filename, ".docx")
     if path.exists():
@@ -33,109 +301,390 @@ def create_docx(filename: str, content: str = "") -> str:
     try:
         doc = Document()
         doc.add_paragraph(content if content.strip() else "(new document)")
-        doc.save(path)
+        save_document(doc, path)
         return f"✅ Created Word document: {path}"
     except Exception as e:
         return f"❌ Failed to create Word doc: {str(e)}"
 
+# Opt-in zstd sidecar (<name>.docx.zst) holding word/document.xml for large files
+USE_ZSTD_CACHE = os.environ.get("USE_ZSTD_CACHE", "") == "1" and zstandard is not None
+ZSTD_CACHE_MIN_SIZE = 1 << 20
+
+def _zstd_sidecar(path: Path) -> Path:
+    return path.with_name(path.name + ".zst")
+
+# Sidecar header: the (mtime_ns, size) of the .docx it was built from
+_ZSTD_HEADER = struct.Struct("<qQ")
+
+def _open_fresh_sidecar(path: Path):
+    # Return the sidecar positioned after its header, or None when it is
+    # missing or was built from a different version of the .docx
+    try:
+        f = open(_zstd_sidecar(path), "rb")
+    except FileNotFoundError:
+        return None
+    header = f.read(_ZSTD_HEADER.size)
+    if len(header) == _ZSTD_HEADER.size and _ZSTD_HEADER.unpack(header) == _file_key(path):
+        return f
+    f.close()
+    return None
+
+def _repack_as_zstd(path: Path) -> None:
+    key = _file_key(path)
+    fd, tmp = tempfile.mkstemp(suffix=".zst", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as out, ZipFile(path, "r") as zf, zf.open("word/document.xml") as xml:
+            out.write(_ZSTD_HEADER.pack(*key))
+            with zstandard.ZstdCompressor().stream_writer(out, closefd=False) as writer:
+                shutil.copyfileobj(xml, writer)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, _zstd_sidecar(path))
+
+@contextmanager
+def open_document_xml(path: Path):
+    """
+    Yield word/document.xml as a binary stream, served from the zstd sidecar
+    when USE_ZSTD_CACHE is on and straight from the .docx package otherwise.
+    """
+    sidecar = _open_fresh_sidecar(path) if USE_ZSTD_CACHE else None
+    if USE_ZSTD_CACHE and sidecar is None and path.stat().st_size >= ZSTD_CACHE_MIN_SIZE:
+        _repack_as_zstd(path)
+        sidecar = _open_fresh_sidecar(path)
+    if sidecar is not None:
+        # The sidecar exists to be re-read, so it stays in the page cache
+        with sidecar, zstandard.ZstdDecompressor().stream_reader(sidecar) as xml:
+            yield xml
+    else:
+        with ZipFile(path, "r") as zf, zf.open("word/document.xml") as xml:
+            yield xml
+        drop_page_cache(path)
+
 @mcp.tool()
+@run_in_thread(".docx")
 def read_docx(filename: str) -> str:
     path = get_path(filename, ".docx")
     if not path.exists():
         return f"❌ File not found: {path}"
 
     try:
-        doc = Document(path)
-        return "\n".join(p.text for p in doc.paragraphs) or "(empty document)"
+        # Stream <w:p> elements instead of building the python-docx object graph
+        paragraphs = []
+        with open_document_xml(path) as xml:
+            for _, elem in etree.iterparse(xml, events=("end",), tag=f"{_W}p"):
+                if next(elem.iterancestors(_MC_FALLBACK), None) is None:
+                    paragraphs.append(_paragraph_text(elem))
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        return "\n".join(paragraphs) or "(empty document)"
     except Exception as e:
         try:
-            with ZipFile(path, "r") as zf:
-                files = zf.namelist()
-                if "word/document.xml" not in files:
-                    return f"❌ Not a Word file. Contains: {files[:10]}..."
+            files = zip_namelist(path)
+            if "word/document.xml" not in files:
+                return f"❌ Not a Word file. Contains: {files[:10]}..."
         except Exception:
             pass
         return f"❌ Failed to read Word doc: {str(e)}"
 
+def _append_paragraphs(path: Path, batches: list[list[str]]) -> None:
+    doc = checkout_document(path, Document)
+    for changes in batches:
+        for change in changes:
+            doc.add_paragraph(change)
+    save_document(doc, path)
+    checkin_document(path, doc)
+
 @mcp.tool()
-def update_docx(filename: str, changes: list[str]) -> str:
+async def update_docx(filename: str, changes: list[str]) -> str:
     path = get_path(filename, ".docx")
     if not path.exists():
         return f"❌ File not found: {path}"
 
     try:
-        doc = Document(path)
-        for change in changes:
-            doc.add_paragraph(change)
-        doc.save(path)
+        await coalesced_update(path, changes, _append_paragraphs)
         return f"✅ Updated Word doc {filename} with {len(changes)} changes."
     except Exception as e:
         return f"❌ Failed to update Word doc: {str(e)}"
 
 @mcp.tool()
+@run_in_thread(".docx")
 def delete_docx(filename: str) -> str:
     path = get_path(filename, ".docx")
     if not path.exists():
         return f"❌ File not found: {path}"
     try:
         os.remove(path)
+        _zstd_sidecar(path).unlink(missing_ok=True)
         return f"🗑️ Deleted Word doc: {path}"
     except Exception as e:
         return f"❌ Failed to delete Word doc: {str(e)}"
 
+def _read_lines(path: Path):
+    # Split the mmapped bytes and decode one line at a time, so the whole file
+    # is never held as a decoded str plus a list of lines. str.splitlines()
+    # on each piece keeps its other boundaries (\r, \f, \v, \x1c-\x1e, ...)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # empty files cannot be mmapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                yield from line.decode("utf-8", "ignore").splitlines()
+
+# Lines converted per parse_xml call in convert_to_docx
+CONVERT_CHUNK_LINES = 1000
+
+def _paragraphs_xml(lines) -> str:
+    # Same markup doc.add_paragraph(line) produces, with tabs as <w:tab/>
+    parts = []
+    for line in lines:
+        if line:
+            run = "<w:tab/>".join(f'<w:t xml:space="preserve">{escape(seg)}</w:t>' if seg else "" for seg in line.split("\t"))
+            parts.append(f"<w:p><w:r>{run}</w:r></w:p>")
+        else:
+            parts.append("<w:p/>")
+    return "".join(parts)
+
+def _is_word_package(path: Path) -> bool:
+    with open(path, "rb") as f:
+        if f.read(4) != b"PK\x03\x04":
+            return False
+    try:
+        return "word/document.xml" in zip_namelist(path)
+    except (ValueError, struct.error):
+        return False
+
+def _clone_file(src: Path, dst: Path) -> None:
+    # Copy inside the kernel; reflink-capable filesystems (btrfs, XFS) can
+    # share extents instead of copying bytes at all
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            return
+        except OSError:
+            pass  # e.g. kernel older than 4.5; copyfile below rewrites dst from scratch
+    # shutil.copyfile uses os.sendfile on Linux and fcopyfile on macOS
+    shutil.copyfile(src, dst)
+
+def _convert_to_docx(input_file: str, in_path: Path, out_path: Path) -> str:
+    if not in_path.exists():
+        return f"❌ Input file not found: {in_path}"
+
+    try:
+        if _is_word_package(in_path):
+            if in_path.resolve() == out_path.resolve():
+                return f"✅ {in_path} is already a Word document"
+            _clone_file(in_path, out_path)
+            drop_page_cache(out_path)
+            return f"✅ Converted {in_path} → {out_path}"
+
+        # Parse CONVERT_CHUNK_LINES paragraphs at a time instead of one
+        # add_paragraph call per line; only one chunk's markup is held as a str
+        doc = Document()
+        target = doc.element.body
+        index = target.index(target.sectPr)
+        lines = _read_lines(in_path)
+        while chunk := list(islice(lines, CONVERT_CHUNK_LINES)):
+            paragraphs = list(parse_xml(f"<w:body {nsdecls('w')}>{_paragraphs_xml(chunk)}</w:body>"))
+            target[index:index] = paragraphs
+            index += len(paragraphs)
+        save_document(doc, out_path)
+        return f"✅ Converted {in_path} → {out_path}"
+    except Exception as e:
+        return f"❌ Could not convert {input_file}: {str(e)}"
+
+@mcp.tool()
+async def convert_to_docx(input_file: str, output_file: str) -> str:
+    """
+    Convert a .txt file (and similar) in the documents folder into a valid
+    .docx. Files that are already Word packages are copied as-is.
+    """
+    resolved, docs_dir = (DOCS_DIR / input_file).resolve(), DOCS_DIR.resolve()
+    if not resolved.is_relative_to(docs_dir):
+        return f"❌ Input file must be inside {DOCS_DIR}: {input_file}"
+    # Rebuild the path the way get_path() does so it maps to the same lock
+    in_path = DOCS_DIR / resolved.relative_to(docs_dir)
+    out_path = get_path(output_file, ".docx")
+    async with file_locks(in_path, out_path):
+        return await asyncio.to_thread(_convert_to_docx, input_file, in_path, out_path)
+
 # -------------------------------
 # EXCEL TOOLS (.xlsx)
 # -------------------------------
 
+# Row count above which workbooks are written with openpyxl's write-only mode
+WRITE_ONLY_THRESHOLD = 1000
+
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+# Package parts and worksheet elements a read-only -> write-only copy carries
+# over; anything else (drawings, chartsheets, comments, tables, column widths,
+# merges, ...) needs load_workbook
+_STREAMABLE_PARTS = (
+    "[Content_Types].xml", "_rels/", "docProps/", "xl/_rels/", "xl/workbook.xml", "xl/styles.xml",
+    "xl/theme/", "xl/sharedStrings.xml", "xl/calcChain.xml", "xl/worksheets/sheet",
+)
+_STREAMABLE_SHEET_TAGS = {f"{_S}{tag}" for tag in ("sheetPr", "dimension", "sheetViews", "sheetFormatPr", "sheetData", "pageMargins")}
+_ROW_FORMAT_ATTRS = ("s", "customFormat", "ht", "customHeight", "hidden", "outlineLevel", "collapsed")
+
+def _xlsx_streamable(path: Path) -> bool:
+    # True when the workbook holds nothing but values and formulas in default
+    # formatting, so _stream_append_xlsx loses nothing
+    names = zip_namelist(path)
+    if not all(name.startswith(_STREAMABLE_PARTS) for name in names):
+        return False
+    with ZipFile(path, "r") as zf:
+        workbook = etree.parse(zf.open("xl/workbook.xml")).getroot()
+        if workbook.find(f"{_S}definedNames/{_S}definedName") is not None:
+            return False
+        if any(sheet.get("state", "visible") != "visible" for sheet in workbook.iter(f"{_S}sheet")):
+            return False
+        if "xl/styles.xml" in names:
+            cell_xfs = etree.parse(zf.open("xl/styles.xml")).getroot().find(f"{_S}cellXfs")
+            if cell_xfs is not None and len(cell_xfs) > 1:
+                return False
+        for name in names:
+            if not name.startswith("xl/worksheets/sheet"):
+                continue
+            context = etree.iterparse(zf.open(name), events=("end",), tag=f"{_S}row")
+            for _, row in context:
+                if any(attr in row.attrib for attr in _ROW_FORMAT_ATTRS):
+                    return False
+                row.clear()
+                while row.getprevious() is not None:
+                    del row.getparent()[0]
+            sheet = context.root
+            if any(child.tag not in _STREAMABLE_SHEET_TAGS for child in sheet):
+                return False
+            if sheet.find(f"{_S}sheetViews/{_S}sheetView/{_S}pane") is not None:
+                return False
+            if sheet.find(f"{_S}sheetPr/{_S}tabColor") is not None:
+                return False
+    return True
+
+def _stream_append_xlsx(path: Path, batches: list[tuple[str, list[list[str]]]]) -> None:
+    """
+    Append rows by streaming the workbook through read-only/write-only copies.
+    Only cell values and formulas are carried over, so callers must check
+    _xlsx_streamable() first.
+    """
+    rows_by_sheet: dict[str, list[list[str]]] = {}
+    for sheet_name, data in batches:
+        rows_by_sheet.setdefault(sheet_name, []).extend(data)
+
+    src = load_workbook(path, read_only=True)
+    fd, tmp = tempfile.mkstemp(suffix=".xlsx", dir=path.parent)
+    os.close(fd)
+    try:
+        wb = Workbook(write_only=True)
+        for src_ws in src.worksheets:
+            ws = wb.create_sheet(src_ws.title)
+            # Read-only sheets trust the stored <dimension>, which some writers
+            # leave stale; without this, rows outside it would be dropped
+            src_ws.reset_dimensions()
+            for row in src_ws.iter_rows(values_only=True):
+                ws.append(row)
+            for row in rows_by_sheet.pop(src_ws.title, []):
+                ws.append(row)
+        for sheet_name, data in rows_by_sheet.items():
+            ws = wb.create_sheet(sheet_name)
+            for row in data:
+                ws.append(row)
+        save_document(wb, Path(tmp))
+    except BaseException:
+        os.remove(tmp)
+        raise
+    finally:
+        src.close()
+    shutil.copymode(path, tmp)
+    os.replace(tmp, path)
+
 @mcp.tool()
+@run_in_thread(".xlsx")
 def create_xlsx(filename: str, sheet_name: str = "Sheet1", data: list[list[str]] = None) -> str:
     path = get_path(filename, ".xlsx")
     if path.exists():
         return f"❌ File already exists: {path}"
 
     try:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = sheet_name
+        if data and len(data) > WRITE_ONLY_THRESHOLD:
+            # Write-only workbooks stream rows to disk instead of keeping every Cell
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(sheet_name)
+        else:
+            wb = Workbook()
+            ws = wb.active
+            ws.title = sheet_name
         if data:
             for row in data:
                 ws.append(row)
-        wb.save(path)
+        save_document(wb, path)
         return f"✅ Created Excel file: {path}"
     except Exception as e:
         return f"❌ Failed to create Excel: {str(e)}"
 
 @mcp.tool()
+@run_in_thread(".xlsx")
 def read_xlsx(filename: str, sheet_name: str = None) -> str:
     path = get_path(filename, ".xlsx")
     if not path.exists():
         return f"❌ File not found: {path}"
 
     try:
-        wb = load_workbook(path, data_only=True)
-        ws = wb[sheet_name] if sheet_name else wb.active
-        rows = [[str(cell.value) if cell.value is not None else "" for cell in row] for row in ws.iter_rows()]
-        return "\n".join([", ".join(r) for r in rows]) or "(empty sheet)"
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet_name] if sheet_name else wb.active
+            # Don't trust the stored <dimension>; stale ones would hide rows
+            ws.reset_dimensions()
+            rows = list(ws.iter_rows(values_only=True))
+            # Unsized sheets yield ragged rows and keep trailing empty <row/>
+            # elements; trim and pad them the way a fully loaded sheet reads
+            while rows and not rows[-1]:
+                rows.pop()
+            width = max(map(len, rows), default=0)
+            # str.join builds a list from its argument anyway, so list comprehensions
+            # skip the generator overhead on every cell
+            lines = [", ".join(["" if v is None else str(v) for v in row] + [""] * (width - len(row))) for row in rows]
+            return "\n".join(lines) or "(empty sheet)"
+        finally:
+            # Read-only workbooks keep the underlying file open until closed
+            wb.close()
+            drop_page_cache(path)
     except Exception as e:
         return f"❌ Failed to read Excel: {str(e)}"
 
+def _append_rows(path: Path, batches: list[tuple[str, list[list[str]]]]) -> None:
+    if any(len(data) > WRITE_ONLY_THRESHOLD for _, data in batches) and _xlsx_streamable(path):
+        _stream_append_xlsx(path, batches)
+        return
+    wb = checkout_document(path, load_workbook)
+    for sheet_name, data in batches:
+        ws = wb[sheet_name] if sheet_name in wb.sheetnames else wb.create_sheet(sheet_name)
+        for row in data:
+            ws.append(row)
+    save_document(wb, path)
+    checkin_document(path, wb)
+
 @mcp.tool()
-def update_xlsx(filename: str, sheet_name: str, data: list[list[str]]) -> str:
+async def update_xlsx(filename: str, sheet_name: str, data: list[list[str]]) -> str:
     path = get_path(filename, ".xlsx")
     if not path.exists():
         return f"❌ File not found: {path}"
 
     try:
-        wb = load_workbook(path)
-        ws = wb[sheet_name] if sheet_name in wb.sheetnames else wb.create_sheet(sheet_name)
-        for row in data:
-            ws.append(row)
-        wb.save(path)
+        await coalesced_update(path, (sheet_name, data), _append_rows)
         return f"✅ Updated Excel file {filename} with {len(data)} rows."
     except Exception as e:
         return f"❌ Failed to update Excel: {str(e)}"
 
 @mcp.tool()
+@run_in_thread(".xlsx")
 def delete_xlsx(filename: str) -> str:
     path = get_path(filename, ".xlsx")
     if not path.exists():
@@ -150,7 +699,30 @@ def delete_xlsx(filename: str) -> str:
 # POWERPOINT TOOLS (.pptx)
 # -------------------------------
 
+_PPTX_NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+}
+_SLIDE_RID_XPATH = etree.XPath("/p:presentation/p:sldIdLst/p:sldId/@r:id", namespaces=_PPTX_NS)
+_A_P_XPATH = etree.XPath(".//a:p", namespaces=_PPTX_NS)
+# Paragraph content in document order: run and field text, and <a:br/> line breaks
+_A_P_CONTENT_XPATH = etree.XPath("a:r/a:t | a:fld/a:t | a:br", namespaces=_PPTX_NS)
+_A_BR = f"{{{_PPTX_NS['a']}}}br"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+def _pptx_slide_parts(zf: ZipFile) -> list[str]:
+    # Slide order comes from presentation.xml, not from the part file names
+    rels = etree.parse(zf.open("ppt/_rels/presentation.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(_REL)}
+    rids = _SLIDE_RID_XPATH(etree.parse(zf.open("ppt/presentation.xml")))
+    return [
+        targets[rid][1:] if targets[rid].startswith("/") else posixpath.normpath(f"ppt/{targets[rid]}")
+        for rid in rids
+    ]
+
 @mcp.tool()
+@run_in_thread(".pptx")
 def create_pptx(filename: str, title: str = "New Presentation", content: str = "") -> str:
     path = get_path(filename, ".pptx")
     if path.exists():
@@ -162,28 +734,37 @@ def create_pptx(filename: str, title: str = "New Presentation", content: str = "
         slide = prs.slides.add_slide(slide_layout)
         slide.shapes.title.text = title
         slide.placeholders[1].text = content
-        prs.save(path)
+        save_document(prs, path)
         return f"✅ Created PowerPoint: {path}"
     except Exception as e:
         return f"❌ Failed to create PowerPoint: {str(e)}"
 
 @mcp.tool()
+@run_in_thread(".pptx")
 def read_pptx(filename: str) -> str:
     path = get_path(filename, ".pptx")
     if not path.exists():
         return f"❌ File not found: {path}"
 
     try:
-        prs = Presentation(path)
+        # Scan slide XML directly instead of building python-pptx shape objects
         slides_text = []
-        for i, slide in enumerate(prs.slides, start=1):
-            texts = [shape.text for shape in slide.shapes if hasattr(shape, "text")]
-            slides_text.append(f"Slide {i}:\n" + "\n".join(texts))
+        with ZipFile(path, "r") as zf:
+            for i, part in enumerate(_pptx_slide_parts(zf), start=1):
+                tree = etree.parse(zf.open(part))
+                # Line breaks read as "\v", the same as python-pptx's paragraph text
+                texts = [
+                    "".join(["\v" if e.tag == _A_BR else e.text or "" for e in _A_P_CONTENT_XPATH(p)])
+                    for p in _A_P_XPATH(tree)
+                ]
+                slides_text.append(f"Slide {i}:\n" + "\n".join(texts))
+        drop_page_cache(path)
         return "\n\n".join(slides_text) or "(empty presentation)"
     except Exception as e:
         return f"❌ Failed to read PowerPoint: {str(e)}"
 
 @mcp.tool()
+@run_in_thread(".pptx")
 def update_pptx(filename: str, slides: list[dict]) -> str:
     """
     slides = [{"title": "Slide Title", "content": "Some text"}]
@@ -193,18 +774,28 @@ def update_pptx(filename: str, slides: list[dict]) -> str:
         return f"❌ File not found: {path}"
 
     try:
+        titles = [s.get("title", "") for s in slides]
+        contents = [s.get("content", "") for s in slides]
+
         prs = Presentation(path)
-        for s in slides:
-            layout = prs.slide_layouts[1]  # Title + Content
+        layout = prs.slide_layouts[1]  # Title + Content
+        # Create every slide first, then fill the placeholders in separate passes
+        title_shapes, body_shapes = [], []
+        for _ in range(len(slides)):
             slide = prs.slides.add_slide(layout)
-            slide.shapes.title.text = s.get("title", "")
-            slide.placeholders[1].text = s.get("content", "")
-        prs.save(path)
+            title_shapes.append(slide.shapes.title)
+            body_shapes.append(slide.placeholders[1])
+        for shape, text in zip(title_shapes, titles):
+            shape.text = text
+        for shape, text in zip(body_shapes, contents):
+            shape.text = text
+        save_document(prs, path)
         return f"✅ Updated PowerPoint {filename} with {len(slides)} new slides."
     except Exception as e:
         return f"❌ Failed to update PowerPoint: {str(e)}"
 
 @mcp.tool()
+@run_in_thread(".pptx")
 def delete_pptx(filename: str) -> str:
     path = get_path(filename, ".pptx")
     if not path.exists():